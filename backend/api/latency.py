@@ -1,58 +1,102 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
 from sqlmodel import Session, select, func
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from backend.db import get_db
-from backend.models.LatencyHistory import LatencyHistory
+from backend.cache import TTLCache
+from backend.clock import cached_utc_now
+from backend.api.responses import UTCORJSONResponse
+from backend.models.LatencyHistory import LatencyHistory, LatencyHistoryMinute
 from typing import List, Dict, Any, Optional
 
 router = APIRouter()
 
-@router.get("/nodes/{node_id}/latency", response_model=List[Dict[str, Any]])
+# Dashboards poll the same (node, hours) minute series repeatedly; rendered JSON bodies
+# are cached so a hit skips the query and serialization. Raw pages are not cached: they
+# are large (up to MAX_RAW_ROWS rows) and keyed per page, so they would pin memory.
+MINUTE_CACHE_TTL = 30  # seconds
+_latency_cache = TTLCache(maxsize=512)
+
+# Raw samples are unbounded over long lookbacks (86,400 per node per day), so they are
+# paged by keyset: a page that was cut short carries X-Next-After, the epoch second of
+# its last sample, and the next page is requested with after=<that value>. Unlike an
+# offset, the cursor does not shift as the window start and retention move forward.
+MAX_RAW_ROWS = 10_000
+NEXT_AFTER_HEADER = "X-Next-After"
+
+@router.get("/nodes/{node_id}/latency", response_model=List[Dict[str, Any]], response_class=UTCORJSONResponse)
 def get_latency_history(
     node_id: str,
     hours: int = Query(24, ge=1, le=168),
     interval: Optional[str] = Query(None, description="Aggregation interval (e.g., 'minute')"),
+    limit: int = Query(MAX_RAW_ROWS, ge=1, le=MAX_RAW_ROWS, description="Maximum number of raw samples to return"),
+    after: Optional[int] = Query(None, description="Return raw samples after this epoch second (X-Next-After of the previous page)"),
     db: Session = Depends(get_db)
 ):
-    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+    cutoff_time = cached_utc_now() - timedelta(hours=hours)
 
     if interval == 'minute':
-        # Use strftime for SQLite compatibility to truncate to the minute
-        # The format '%Y-%m-%dT%H:%M:00Z' effectively truncates seconds and microseconds
-        minute_col = func.strftime('%Y-%m-%dT%H:%M:00Z', LatencyHistory.timestamp).label("minute_interval_str")
-        avg_latency_col = func.avg(LatencyHistory.latency_ms).label("avg_latency")
+        cache_key = (node_id, hours)
+        cached_body = _latency_cache.get(cache_key)
+        if cached_body is not None:
+            return Response(content=cached_body, media_type="application/json")
+
+        # Read pre-aggregated buckets from the rollup table maintained by the heartbeat writer.
+        # Floor the cutoff so the partially covered first minute is still returned.
+        minute_cutoff = cutoff_time.replace(second=0, microsecond=0)
+        avg_latency_col = (LatencyHistoryMinute.sum_ms / LatencyHistoryMinute.count).label("avg_latency")
 
         statement = (
-            select(minute_col, avg_latency_col)
-            .where(LatencyHistory.node_id == node_id)
-            .where(LatencyHistory.timestamp >= cutoff_time)
-            .where(LatencyHistory.latency_ms.is_not(None))
-            .group_by(minute_col) # Group by the same strftime expression
-            .order_by(minute_col.asc()) # Order by the truncated time string
+            select(LatencyHistoryMinute.minute_ts, avg_latency_col)
+            .where(LatencyHistoryMinute.node_id == node_id)
+            .where(LatencyHistoryMinute.minute_ts >= minute_cutoff)
+            .where(LatencyHistoryMinute.count > 0)
+            .order_by(LatencyHistoryMinute.minute_ts.asc())
         )
         results = db.exec(statement).all()
 
-        # Format aggregated results - the time is already an ISO-like string from strftime
-        return [
-            {"time": row.minute_interval_str, "latency_ms": row.avg_latency} # <--- CHANGE 'latency' TO 'latency_ms'
-            for row in results if row.minute_interval_str
-        ]
+        # Bucket datetimes are serialized natively by orjson as '...T12:34:00Z'
+        response = UTCORJSONResponse([
+            {"time": row.minute_ts, "latency_ms": row.avg_latency}
+            for row in results
+        ])
+        _latency_cache.set(cache_key, response.body, MINUTE_CACHE_TTL)
+        return response
 
     else:
-        # Fetch raw data (original behavior)
+        # Fetch raw data, projecting only the returned columns (plus the epoch second for
+        # the cursor) and letting SQLite render the ISO timestamp, so no ORM objects or
+        # Python datetimes are built per row
+        time_col = func.strftime('%Y-%m-%dT%H:%M:%SZ', LatencyHistory.timestamp, 'unixepoch').label("time")
+
         statement = (
-            select(LatencyHistory)
+            select(LatencyHistory.timestamp, time_col, LatencyHistory.latency_ms)
             .where(LatencyHistory.node_id == node_id)
-            .where(LatencyHistory.timestamp >= cutoff_time)
             .order_by(LatencyHistory.timestamp.asc())
         )
-        results = db.exec(statement).all()
+        # The first page fixes the window start; later pages continue from the cursor
+        if after is None:
+            paged = statement.where(LatencyHistory.timestamp >= int(cutoff_time.timestamp()))
+        else:
+            paged = statement.where(LatencyHistory.timestamp > after)
+        rows = db.exec(paged.limit(limit + 1)).all()  # One extra row tells whether another page follows
 
-        if not results:
-            return []
+        page = rows[:limit]
+        if len(rows) > limit:
+            last_second = page[-1].timestamp
+            if rows[limit].timestamp == last_second:
+                # The cursor is a whole second, so samples sharing one must not be split
+                # across pages: leave them all to the next page, or return them all here
+                # when they are the entire page
+                page = [row for row in page if row.timestamp != last_second]
+                if not page:
+                    page = db.exec(statement.where(LatencyHistory.timestamp == last_second)).all()
 
-        # Format raw results
-        return [
-            {"time": lh.timestamp.isoformat() + "Z", "latency_ms": lh.latency_ms} # Already correct here
-            for lh in results
-        ]
\ No newline at end of file
+        # The rows go straight to orjson, with no jsonable_encoder pass over them
+        response = UTCORJSONResponse([
+            {"time": row.time, "latency_ms": row.latency_ms}
+            for row in page
+        ])
+        if len(rows) > limit:
+            response.headers[NEXT_AFTER_HEADER] = str(page[-1].timestamp)
+        return response
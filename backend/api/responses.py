@@ -0,0 +1,14 @@
+import orjson
+from typing import Any
+from fastapi.responses import ORJSONResponse
+
+class UTCORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that renders datetimes as UTC ISO-8601 strings with a 'Z' suffix.
+    Naive datetimes (as read back from SQLite) are treated as UTC.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        )
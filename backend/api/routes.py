@@ -1,18 +1,26 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from ..config import VERSION, VMARK_ID
-from ..models.Node import Node
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+from datetime import datetime, timezone
+from typing import List, Optional, Dict, Any, NamedTuple, Union
+from ..config import HTTP_TIMEOUTS, VERSION, VMARK_ID
+from ..models.Node import Node, unpack_tags
 from ..models.eline_service import ELineService, ELineServiceCreate, ELineServiceRead, ELineServiceUpdate, ForwardingRuleDetails
-from ..db import get_db
+from ..db import engine, get_db
 from sqlmodel import Session, select
 import httpx
 import json
+import orjson
 import asyncio
-from sqlalchemy.exc import IntegrityError # Import IntegrityError
+import threading
+from collections import defaultdict
+from functools import lru_cache
+from sqlalchemy import bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+from ..cache import TTLCache
 
 # --- Add Logging Setup ---
 log = logging.getLogger(__name__)
@@ -23,23 +31,108 @@ log = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def get_node_client(request: Request) -> httpx.AsyncClient:
+    """
+    Shared client for all outbound calls to vMark-nodes, so connections are pooled
+    and kept alive between requests. Owned by the application lifespan (see backend/main.py).
+    """
+    return request.app.state.node_client
+
+def _node_base_url(ip: str, port: Optional[int]) -> str:
+    """Base URL of a node's API, bracketing IPv6 addresses"""
+    if ":" in ip:  # IPv6
+        return f"http://[{ip}]:{port}"
+    return f"http://{ip}:{port}"
+
+class NodeAddress(NamedTuple):
+    """Where to reach a node; all the RPC helpers need from its row"""
+    id: str
+    ip: str
+    port: Optional[int]
+    base_url: str  # Built once per cached node instead of on every call
+
+# Node addresses rarely change, so lookups made for every node RPC are served from
+# memory. Entries are dropped when a node is registered, updated or deleted.
+# Each invalidation also bumps the node's version, and a row is only cached if the
+# version is unchanged since before it was read, so a lookup that raced a write
+# cannot put the old address back after the invalidation.
+NODE_CACHE_TTL = 30.0
+_node_cache = TTLCache(maxsize=1024)
+_node_versions: Dict[str, int] = {}
+_node_versions_lock = threading.Lock()
+
+def _node_version(node_id: str) -> int:
+    return _node_versions.get(node_id, 0)
+
+def _invalidate_node(node_id: str):
+    """Drop a node's cached address; call after committing a change to the node"""
+    with _node_versions_lock:
+        _node_versions[node_id] = _node_versions.get(node_id, 0) + 1
+        _node_cache.pop(node_id)
+
+def _cache_node(node: Node, version: int) -> NodeAddress:
+    """Address of a node row, cached unless the node changed since version was taken"""
+    address = NodeAddress(node.id, node.ip, node.port, _node_base_url(node.ip, node.port))
+    with _node_versions_lock:
+        if _node_version(node.id) == version:
+            _node_cache.set(node.id, address, NODE_CACHE_TTL)
+    return address
+
+def _resolve_node(node_id: str, db: Session) -> Optional[NodeAddress]:
+    """Address of a node from the cache, falling back to the database"""
+    address = _node_cache.get(node_id)
+    if address is None:
+        version = _node_version(node_id)  # Taken before the read it guards
+        node = db.get(Node, node_id)
+        if node is None:
+            return None
+        address = _cache_node(node, version)
+    return address
+
+# Cap on in-flight requests to any one node, however many listings or batch polls
+# fan out to it at once, so a slow node gets queued work instead of a request burst
+NODE_CONCURRENCY = 8
+_node_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(NODE_CONCURRENCY))
+
+async def _resolve_node_async(node_id: str, db: Session) -> Optional[NodeAddress]:
+    """Like _resolve_node, but runs the database lookup on a miss in the threadpool"""
+    address = _node_cache.get(node_id)
+    if address is None:
+        address = await run_in_threadpool(_resolve_node, node_id, db)
+    return address
+
 # Add this new endpoint
 @router.get("/version")
 def get_version():
     """Get the current version of the API"""
     return {"version": VERSION}
 
-@router.get("/nodes")
-def get_nodes(db: Session = Depends(get_db)):
+# Statements for the hot read paths, built once at import instead of per request;
+# per-request values are bound as parameters.
+_SELECT_NODE_COLUMNS = select(Node.id, Node.ip, Node.port, Node.status, Node.tags, Node.last_seen)
+_SELECT_NODES_BY_IDS = select(Node).where(Node.id.in_(bindparam("node_ids", expanding=True)))
+_SELECT_ELINES = select(ELineService).options(selectinload(ELineService.a_node), selectinload(ELineService.z_node))
+_SELECT_ELINE_BY_NAME = _SELECT_ELINES.where(ELineService.name == bindparam("name"))
+
+@router.get("/nodes", response_class=ORJSONResponse)
+def get_nodes():
     """Get all registered nodes"""
-    nodes_from_db = db.exec(select(Node)).all()
-    nodes_list = []
-    for node in nodes_from_db:
-        node_dict = node.dict()
-        # Convert comma-separated string back to list
-        node_dict["tags"] = node.tags.split(',') if node.tags else []
-        nodes_list.append(node_dict)
-    return nodes_list
+    # Read-only: select plain columns on a pooled Core connection, so no Session or Node
+    # models are built just to be re-serialized, and hand the list straight to orjson
+    # instead of a jsonable_encoder pass + json.dumps
+    with engine.connect() as conn:
+        rows = conn.execute(_SELECT_NODE_COLUMNS).all()
+    return ORJSONResponse([
+        {
+            "id": row.id,
+            "ip": row.ip,
+            "port": row.port,
+            "status": row.status,
+            "tags": unpack_tags(row.tags),
+            "last_seen": row.last_seen,
+        }
+        for row in rows
+    ])
 
 class RegisterNode(BaseModel):
     node_id: str
@@ -48,65 +141,69 @@ class RegisterNode(BaseModel):
     auth_token: str
     port: int = 1050  # Default port if not provided
 
+async def _request_token_validation(client: httpx.AsyncClient, ip: str, port: int, auth_token: str) -> httpx.Response:
+    """Ask a vMark-node to validate an auth token for this vMark instance"""
+    target_url = f"{_node_base_url(ip, port)}/register"
+
+    log.debug("Attempting to validate token with: %s", target_url)
+
+    return await client.post(
+        target_url,
+        json={
+            "auth_token": auth_token,
+            "vmark_id": VMARK_ID  # Send vMark ID during registration
+        },
+        timeout=HTTP_TIMEOUTS["register"]
+    )
+
 @router.post("/register")
-async def register_node(node: RegisterNode, db: Session = Depends(get_db)):
+async def register_node(node: RegisterNode, db: Session = Depends(get_db), client: httpx.AsyncClient = Depends(get_node_client)):
     try:
-        # Try to validate token with vMark-node
-        async with httpx.AsyncClient() as client:
-            port = getattr(node, 'port', 1050)
-            
-            if ":" in node.ip:  # Handle IPv6 format
-                target_url = f"http://[{node.ip}]:{port}/register"
-            else:
-                target_url = f"http://{node.ip}:{port}/register"
-                
-            print(f"Attempting to connect to: {target_url}")
-            
-            response = await client.post(
-                target_url,
-                json={
-                    "auth_token": node.auth_token,
-                    "vmark_id": VMARK_ID  # Send vMark ID during registration
-                },
-                timeout=5.0
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=401,
-                    detail=f"Token validation failed: {response.text}"
-                )
+        port = getattr(node, 'port', 1050)
+
+        # Register the node: insert, or refresh the existing row, in one statement
+        stmt = sqlite_insert(Node).values(
+            id=node.node_id,
+            ip=node.ip,
+            port=node.port,  # Save the port
+            tags=node.tags,  # Use tags
+            status="online",
+            last_seen=datetime.now(timezone.utc)  # Aware UTC, as the heartbeat stamps last_seen
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "ip": stmt.excluded.ip,
+                "port": stmt.excluded.port,
+                "tags": stmt.excluded.tags,
+                "status": stmt.excluded.status,
+                "last_seen": stmt.excluded.last_seen
+            }
+        )
 
-        # Continue with node registration
-        existing_node = db.query(Node).filter(Node.id == node.node_id).first()
-        if existing_node:
-            existing_node.ip = node.ip
-            existing_node.port = node.port  # Save the port
-            existing_node.tags = ",".join(node.tags) if node.tags else "" # Use tags
-            existing_node.status = "online"
-            existing_node.last_seen = datetime.utcnow()
-        else:
-            new_node = Node(
-                id=node.node_id,
-                ip=node.ip,
-                port=node.port,  # Save the port
-                tags=",".join(node.tags) if node.tags else "", # Use tags
-                status="online",
-                last_seen=datetime.utcnow()
+        # Validate the token with the vMark-node before writing anything: the upsert
+        # opens a SQLite write transaction, which must not stay open (and block the
+        # heartbeat writer) for the duration of a remote call.
+        response = await _request_token_validation(client, node.ip, port, node.auth_token)
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=401,
+                detail=f"Token validation failed: {response.text}"
             )
-            db.add(new_node)
-        
-        db.commit()
+
+        await run_in_threadpool(db.exec, stmt)
+        await run_in_threadpool(db.commit)
+        _invalidate_node(node.node_id)
         return {"message": "Registration successful", "node_id": node.node_id}
 
     except httpx.RequestError as e:
-        print(f"Connection error: {str(e)}")
+        log.error("Connection error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Could not connect to vMark-node: {str(e)}"
         )
     except Exception as e:
-        print(f"Registration error: {str(e)}")
+        log.error("Registration error: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Registration error: {str(e)}"
@@ -119,52 +216,71 @@ class UpdateNode(BaseModel):
     tags: List[str] = [] # Rename capabilities to tags
     auth_token: Optional[str] = None # Make token optional for updates
 
-@router.put("/nodes/{node_id}")
-async def update_node(node_id: str, node_update: UpdateNode, db: Session = Depends(get_db)):
+class NodeOut(BaseModel):
+    """Node details as returned by the API"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    ip: str
+    port: Optional[int] = None
+    tags: List[str] = []
+    status: str
+    last_seen: Optional[datetime] = None
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def _tags_or_empty(cls, value):
+        return unpack_tags(value)
+
+class UpdateNodeResponse(BaseModel):
+    message: str
+    node: NodeOut
+
+@router.put("/nodes/{node_id}", response_model=UpdateNodeResponse)
+async def update_node(node_id: str, node_update: UpdateNode, db: Session = Depends(get_db), client: httpx.AsyncClient = Depends(get_node_client)):
     """Update an existing node's details"""
-    existing_node = db.query(Node).filter(Node.id == node_id).first()
+    # Look the node up while the (optional) new token is being validated
+    lookup = run_in_threadpool(db.get, Node, node_id)
+    if node_update.auth_token:
+        existing_node, validation = await asyncio.gather(
+            lookup,
+            _request_token_validation(client, node_update.ip, node_update.port, node_update.auth_token),
+            return_exceptions=True
+        )
+        if isinstance(existing_node, BaseException):
+            raise existing_node
+    else:
+        existing_node, validation = await lookup, None
+
     if not existing_node:
         raise HTTPException(status_code=404, detail="Node not found")
 
     # Optional: Validate new token if provided
     if node_update.auth_token:
         try:
-            async with httpx.AsyncClient() as client:
-                port = node_update.port
-                if ":" in node_update.ip:  # Handle IPv6 format
-                    target_url = f"http://[{node_update.ip}]:{port}/register" # Or a specific validation endpoint?
-                else:
-                    target_url = f"http://{node_update.ip}:{port}/register"
-
-                print(f"Attempting to validate new token with: {target_url}")
-                response = await client.post(
-                    target_url,
-                    json={
-                        "auth_token": node_update.auth_token,
-                        "vmark_id": VMARK_ID
-                    },
-                    timeout=5.0
+            response = validation
+            if isinstance(response, BaseException):
+                raise response
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=401,
+                    detail=f"New token validation failed: {response.text}"
                 )
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=401,
-                        detail=f"New token validation failed: {response.text}"
-                    )
             # If validation succeeds, you might want to store the new token securely
             # For now, we assume validation means we can proceed with other updates.
             # NOTE: The current Node model doesn't store the token, so this validation
             #       only confirms the node accepts it. You might need to adjust logic
             #       if the central server needs to store/use the token later.
-            print("New token validated successfully.")
+            log.debug("New token validated successfully.")
 
         except httpx.RequestError as e:
-            print(f"Connection error during token validation: {str(e)}")
+            log.error("Connection error during token validation: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Could not connect to vMark-node to validate token: {str(e)}"
             )
         except Exception as e:
-            print(f"Token validation error: {str(e)}")
+            log.error("Token validation error: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail=f"Token validation error: {str(e)}"
@@ -173,31 +289,31 @@ async def update_node(node_id: str, node_update: UpdateNode, db: Session = Depen
     # Update node details
     existing_node.ip = node_update.ip
     existing_node.port = node_update.port
-    existing_node.tags = ",".join(node_update.tags) if node_update.tags else "" # Use tags
+    existing_node.tags = node_update.tags  # Use tags
     # Optionally update last_seen or status if needed upon successful update/validation
     # existing_node.last_seen = datetime.utcnow()
 
     try:
         db.add(existing_node) # Add the updated instance
-        db.commit()
-        db.refresh(existing_node) # Refresh to get updated state if needed
-        # Manually convert comma-separated string back to list for the response
-        response_node_dict = existing_node.dict()
-        response_node_dict["tags"] = existing_node.tags.split(',') if existing_node.tags else []
-        return {"message": "Node updated successfully", "node": response_node_dict}
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, existing_node) # Refresh to get updated state if needed
+        _invalidate_node(node_id)
+        # Serialized straight from the ORM instance through NodeOut
+        return {"message": "Node updated successfully", "node": existing_node}
     except Exception as e:
-        db.rollback()
-        print(f"Database error during update: {str(e)}")
+        await run_in_threadpool(db.rollback)
+        log.error("Database error during update: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to update node in database: {str(e)}")
 
 @router.delete("/nodes/{node_id}")
 def delete_node(node_id: str, db: Session = Depends(get_db)):
-    node = db.query(Node).filter(Node.id == node_id).first()
+    node = db.get(Node, node_id)
     if not node:
         raise HTTPException(status_code=404, detail="Node not found")
     
     db.delete(node)
     db.commit()
+    _invalidate_node(node_id)
     return {"message": "Node deleted successfully"}
 
 class ExecuteCommandPayload(BaseModel):
@@ -206,42 +322,69 @@ class ExecuteCommandPayload(BaseModel):
     # vmark_id is optional here, as the backend will use its own ID to talk to the node
     vmark_id: Optional[str] = None
 
-@router.post("/nodes/{node_id}/execute")
-async def execute_node_command(node_id: str, payload: ExecuteCommandPayload, db: Session = Depends(get_db)):
-    # Busca el nodo en la base de datos
-    node = db.query(Node).filter(Node.id == node_id).first()
-    if not node:
-        raise HTTPException(status_code=404, detail="Node not found")
-    node_ip = node.ip
-    node_port = node.port
-
-    # Construye la URL de destino
-    if ":" in node_ip:  # IPv6
-        target_url = f"http://[{node_ip}]:{node_port}/api/execute"
-    else:
-        target_url = f"http://{node_ip}:{node_port}/api/execute"
-
-    node_payload = {
-        "command": payload.command,
-        "vmark_id": VMARK_ID
-    }
-
+# Constant part of every /api/execute body, encoded once; only the command varies
+_EXECUTE_BODY_PREFIX = orjson.dumps({"vmark_id": VMARK_ID})[:-1] + b',"command":'
+_JSON_HEADERS = {"content-type": "application/json"}
+
+@lru_cache(maxsize=1024)
+def _execute_body(command: str) -> bytes:
+    """JSON body for a node's /api/execute endpoint; status polls repeat the same commands"""
+    return _EXECUTE_BODY_PREFIX + orjson.dumps(command) + b"}"
+
+async def _post_to_node(
+    client: httpx.AsyncClient,
+    node: NodeAddress,
+    command: str,
+    timeout: httpx.Timeout,
+    json_error_detail: bool = False
+) -> httpx.Response:
+    """
+    Run a command through a node's /api/execute endpoint using the shared client.
+    Connection failures and non-2xx answers are raised as HTTPException with a string
+    detail; with json_error_detail, a JSON error body from the node is passed through
+    as the detail instead.
+    """
+    target_url = f"{node.base_url}/api/execute"
+    log.debug("Sending command to %s: %s", target_url, command)
     try:
-        async with httpx.AsyncClient() as client:
+        async with _node_semaphores[node.id]:
             response = await client.post(
                 target_url,
-                json=node_payload,
-                timeout=10.0
+                content=_execute_body(command), # Authenticates with the node through vmark_id
+                headers=_JSON_HEADERS,
+                timeout=timeout
             )
-            response.raise_for_status()
-            try:
-                result_data = response.json()
-            except Exception as e:
-                raise HTTPException(status_code=502, detail=f"Invalid JSON from node: {e}")
+        response.raise_for_status() # Raise HTTPError for 4xx/5xx
+        return response
     except httpx.RequestError as e:
-        raise HTTPException(status_code=502, detail=f"Could not connect to node: {e}")
+        error_detail = f"Could not connect to node '{node.id}' at {target_url}: {e}"
+        log.error(error_detail)
+        raise HTTPException(status_code=502, detail=error_detail) # Bad Gateway
     except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail=f"Node error: {e.response.text}")
+        error_detail = f"Node '{node.id}' API error: {e.response.status_code} - {e.response.text}"
+        log.error(error_detail)
+        if not json_error_detail:
+            raise HTTPException(status_code=e.response.status_code, detail=f"Node error: {e.response.text}")
+        try:
+            # Pass the node's own error payload through when it sent JSON
+            detail = e.response.json()
+        except json.JSONDecodeError:
+            detail = error_detail
+        raise HTTPException(status_code=e.response.status_code, detail=detail)
+
+@router.post("/nodes/{node_id}/execute")
+async def execute_node_command(node_id: str, payload: ExecuteCommandPayload, db: Session = Depends(get_db), client: httpx.AsyncClient = Depends(get_node_client)):
+    # Busca el nodo en la base de datos
+    node = await _resolve_node_async(node_id, db)
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found")
+    response = await _post_to_node(client, node, payload.command, timeout=HTTP_TIMEOUTS["execute"])
+    # Commands run through here (e.g. xdp-switch rule changes) may alter the node's forwarding table
+    _invalidate_forwarding_cache(node_id)
+    try:
+        result_data = response.json()
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Invalid JSON from node: {e}")
 
     if not isinstance(result_data, dict) or "output" not in result_data:
         raise HTTPException(status_code=502, detail="Node did not return expected output")
@@ -260,105 +403,80 @@ async def execute_node_command(node_id: str, payload: ExecuteCommandPayload, db:
     else:
         return {"output": handler_output}
 
-# --- NEW ROUTE for TWAMP Status/Results ---
-@router.get("/nodes/{node_id}/twamp/status", tags=["TWAMP"])
-async def get_twamp_sender_status(
+class TwampStatusOutput(BaseModel):
+    """Result of the node's 'twamp ... status sender' handler"""
+    model_config = ConfigDict(extra="allow")
+
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+class TwampStatusEnvelope(BaseModel):
+    """Response body of a node's /api/execute endpoint for a TWAMP status command"""
+    output: Union[TwampStatusOutput, str]
+
+# Sender status command per supported IP version; unknown versions are rejected.
+_TWAMP_STATUS_COMMANDS = {
+    "ipv4": "twamp ipv4 status sender destination-ip {0} port {1}",
+    "ipv6": "twamp ipv6 status sender destination-ip {0} port {1}",
+}
+
+async def _fetch_twamp_sender_status(
+    client: httpx.AsyncClient,
     node_id: str,
-    ip_version: str = Query(..., description="IP version used for the test ('ipv4' or 'ipv6')"),
-    dest_ip: str = Query(..., description="Destination IP address of the sender test"),
-    port: int = Query(..., description="Destination port of the sender test"),
-    db: Session = Depends(get_db) # Add DB dependency
-):
+    node: Optional[NodeAddress],
+    ip_version: str,
+    dest_ip: str,
+    port: int
+) -> Dict[str, Any]:
     """
-    Check the status or retrieve results of a background TWAMP sender test by querying the node.
+    Query a node for the status of one TWAMP sender test.
+    Raises HTTPException with the status code to report to the client on failure.
     """
-    log.info(f"Received status request for TWAMP sender on node {node_id} to {dest_ip}:{port} ({ip_version})")
-
-    # Validate ip_version
-    if ip_version not in ['ipv4', 'ipv6']:
+    # Validate ip_version and pick the matching command template
+    command_template = _TWAMP_STATUS_COMMANDS.get(ip_version)
+    if command_template is None:
         raise HTTPException(status_code=400, detail="Invalid ip_version. Use 'ipv4' or 'ipv6'.")
 
-    # --- Find the node to get its IP and Port ---
-    node = db.exec(select(Node).where(Node.id == node_id)).first()
+    # --- Check the node resolved by the caller ---
     if not node:
         raise HTTPException(status_code=404, detail=f"Node '{node_id}' not found")
     if not node.port:
          raise HTTPException(status_code=400, detail=f"Node '{node_id}' does not have a configured port.")
-    # --- End Find Node ---
+    # --- End Check Node ---
 
     # Construct the command string for the agent
-    command_string = f"twamp {ip_version} status sender destination-ip {dest_ip} port {port}"
-
-    # --- Prepare to call the node's /execute endpoint ---
-    node_ip = node.ip
-    node_port = node.port
-    if ":" in node_ip: # IPv6
-        target_url = f"http://[{node_ip}]:{node_port}/api/execute"
-    else: # IPv4
-        target_url = f"http://{node_ip}:{node_port}/api/execute"
-
-    node_payload = {
-        "command": command_string,
-        "vmark_id": VMARK_ID # Authenticate with the node
-    }
-    # --- End Preparation ---
+    command_string = command_template.format(dest_ip, port)
 
     try:
         # --- Execute the status command via the node's API ---
-        async with httpx.AsyncClient() as client:
-            log.debug(f"Sending status command to {target_url}: {command_string}")
-            response = await client.post(
-                target_url,
-                json=node_payload,
-                timeout=10.0 # Timeout for status check
-            )
-            response.raise_for_status() # Raise HTTPError for 4xx/5xx
-            result_data = response.json()
+        response = await _post_to_node(client, node, command_string, timeout=HTTP_TIMEOUTS["status"], json_error_detail=True)
         # --- End Execute via API ---
 
-        log.debug(f"Result from node {node_id} status command: {result_data}")
-
-        # The node's /api/execute endpoint should return a JSON object.
-        # If the command itself failed on the node, the node should return a non-200 status
-        # or include an 'error' field in its JSON response.
-        # We rely on raise_for_status() and the node's response structure.
-
-        # Assuming the node returns {"output": <handler_result>} on success
-        # and raises HTTP error or returns {"error": ...} on failure.
-        if isinstance(result_data, dict) and "output" in result_data:
-             # The actual result from the twamp.handle function is likely in the 'output' field
-             handler_output = result_data["output"]
-
-             # Now, check the format of the handler_output
-             if isinstance(handler_output, dict) and handler_output.get("error"):
-                 status_code = 404 if "No active sender found" in handler_output["error"] else 400
-                 raise HTTPException(status_code=status_code, detail=handler_output["error"])
-             elif isinstance(handler_output, str) and handler_output.lower().startswith("error"):
-                 raise HTTPException(status_code=400, detail=handler_output)
-             elif not isinstance(handler_output, dict) or "status" not in handler_output:
-                 log.error(f"Unexpected format in 'output' from node's twamp status handler: {handler_output}")
-                 raise HTTPException(status_code=500, detail="Internal server error: Invalid status response format from node.")
-             else:
-                 # Success - return the dictionary from the handler_output
-                 return handler_output
-        else:
-             # If the node's response doesn't contain "output" as expected
-             log.error(f"Unexpected response structure from node {node_id}: {result_data}")
-             raise HTTPException(status_code=500, detail="Internal server error: Unexpected response structure from node.")
-
-    except httpx.RequestError as e:
-        error_detail = f"Could not connect to node '{node_id}' at {target_url} for status check: {str(e)}"
-        log.error(error_detail)
-        raise HTTPException(status_code=502, detail=error_detail) # Bad Gateway
-    except httpx.HTTPStatusError as e:
-        # Handle non-2xx responses from the node API during the status check
-        error_detail = f"Node '{node_id}' API error during status check: {e.response.status_code} - {e.response.text}"
-        log.error(error_detail)
+        # The node's /api/execute endpoint returns {"output": <handler_result>} on success,
+        # and either a non-200 status or an 'error' field when the command failed.
+        # Parse and validate the body in one step instead of json() + isinstance checks.
         try:
-            node_error_data = e.response.json()
-            raise HTTPException(status_code=e.response.status_code, detail=node_error_data)
-        except json.JSONDecodeError:
-             raise HTTPException(status_code=e.response.status_code, detail=error_detail)
+            result = TwampStatusEnvelope.model_validate_json(response.content)
+        except ValidationError:
+            log.error(f"Unexpected response structure from node {node_id}: {response.text}")
+            raise HTTPException(status_code=500, detail="Internal server error: Unexpected response structure from node.")
+
+        log.debug("Result from node %s status command: %s", node_id, result)
+        handler_output = result.output
+
+        if isinstance(handler_output, str):
+            if handler_output.lower().startswith("error"):
+                raise HTTPException(status_code=400, detail=handler_output)
+        elif handler_output.error:
+            status_code = 404 if "No active sender found" in handler_output.error else 400
+            raise HTTPException(status_code=status_code, detail=handler_output.error)
+        elif "status" in handler_output.model_fields_set:
+            # Success - return the handler output as sent by the node
+            return handler_output.model_dump(exclude_unset=True)
+
+        log.error(f"Unexpected format in 'output' from node's twamp status handler: {handler_output}")
+        raise HTTPException(status_code=500, detail="Internal server error: Invalid status response format from node.")
+
     except HTTPException as http_exc:
         # Re-raise FastAPI HTTP exceptions (like the ones raised after checking handler_output)
         raise http_exc
@@ -366,45 +484,76 @@ async def get_twamp_sender_status(
         log.exception(f"Error processing TWAMP status request for node {node_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error processing status request: {e}")
 
-# --- End New Route ---
+# --- NEW ROUTE for TWAMP Status/Results ---
+@router.get("/nodes/{node_id}/twamp/status", tags=["TWAMP"])
+async def get_twamp_sender_status(
+    node_id: str,
+    ip_version: str = Query(..., description="IP version used for the test ('ipv4' or 'ipv6')"),
+    dest_ip: str = Query(..., description="Destination IP address of the sender test"),
+    port: int = Query(..., description="Destination port of the sender test"),
+    db: Session = Depends(get_db), # Add DB dependency
+    client: httpx.AsyncClient = Depends(get_node_client)
+):
+    """
+    Check the status or retrieve results of a background TWAMP sender test by querying the node.
+    """
+    log.info("Received status request for TWAMP sender on node %s to %s:%s (%s)", node_id, dest_ip, port, ip_version)
+    node = await _resolve_node_async(node_id, db)
+    return await _fetch_twamp_sender_status(client, node_id, node, ip_version, dest_ip, port)
 
-@router.get("/eline-services", response_model=List[ELineServiceRead])
-async def list_eline_services(db: Session = Depends(get_db)):
-    services_from_db = db.exec(
-        select(ELineService)
-        .options(selectinload(ELineService.a_node), selectinload(ELineService.z_node))
-    ).all()
-    
-    response_list = []
-    for db_service in services_from_db:
-        # Fetch rule details concurrently for efficiency
-        a_rule_task = _get_rule_details_from_node(db_service.a_node_id, db_service.a_rule_name, db)
-        z_rule_task = _get_rule_details_from_node(db_service.z_node_id, db_service.z_rule_name, db)
-        a_rule_data, z_rule_data = await asyncio.gather(a_rule_task, z_rule_task)
-
-        service_active = bool(a_rule_data and a_rule_data.active and z_rule_data and z_rule_data.active)
-        
-        a_node_ip = db_service.a_node.ip if db_service.a_node else None
-        z_node_ip = db_service.z_node.ip if db_service.z_node else None
-
-        response_list.append(ELineServiceRead(
-            name=db_service.name,
-            description=db_service.description,
-            a_node_id=db_service.a_node_id,
-            a_iface=db_service.a_iface,
-            a_rule_name=db_service.a_rule_name,
-            z_node_id=db_service.z_node_id,
-            z_iface=db_service.z_iface,
-            z_rule_name=db_service.z_rule_name,
-            created_at=db_service.created_at,
-            updated_at=db_service.updated_at,
-            a_node_ip=a_node_ip,
-            z_node_ip=z_node_ip,
-            active=service_active,
-            a_rule_data=a_rule_data, 
-            z_rule_data=z_rule_data 
-        ))
-    return response_list
+class TwampStatusQuery(BaseModel):
+    """One sender to query in a batch TWAMP status request"""
+    node_id: str
+    ip_version: str
+    dest_ip: str
+    port: int
+
+# Upper bound on concurrent node queries issued by a single batch request
+TWAMP_BATCH_CONCURRENCY = 64
+
+@router.post("/twamp/status/batch", tags=["TWAMP"])
+async def get_twamp_sender_status_batch(
+    queries: List[TwampStatusQuery],
+    db: Session = Depends(get_db),
+    client: httpx.AsyncClient = Depends(get_node_client)
+):
+    """
+    Check the status of several TWAMP sender tests at once, querying the nodes concurrently.
+    Results are returned in request order, each with its own status_code.
+    """
+    log.info("Received batch status request for %d TWAMP senders", len(queries))
+
+    # Resolve every referenced node from the cache, with a single IN query for the rest
+    nodes: Dict[str, NodeAddress] = {}
+    missing = set()
+    for node_id in {query.node_id for query in queries}:
+        address = _node_cache.get(node_id)
+        if address is None:
+            missing.add(node_id)
+        else:
+            nodes[node_id] = address
+    if missing:
+        versions = {node_id: _node_version(node_id) for node_id in missing}
+        found = await run_in_threadpool(lambda: db.exec(_SELECT_NODES_BY_IDS, params={"node_ids": list(missing)}).all())
+        nodes.update((node.id, _cache_node(node, versions[node.id])) for node in found)
+    semaphore = asyncio.Semaphore(TWAMP_BATCH_CONCURRENCY)
+
+    async def fetch_one(query: TwampStatusQuery) -> Dict[str, Any]:
+        entry = query.model_dump()
+        async with semaphore:
+            try:
+                entry["result"] = await _fetch_twamp_sender_status(
+                    client, query.node_id, nodes.get(query.node_id), query.ip_version, query.dest_ip, query.port
+                )
+                entry["status_code"] = 200
+            except HTTPException as e:
+                entry["status_code"] = e.status_code
+                entry["error"] = e.detail
+        return entry
+
+    return await asyncio.gather(*(fetch_one(query) for query in queries))
+
+# --- End New Route ---
 
 @router.post("/eline-services", response_model=ELineServiceRead)
 def create_eline_service(service_payload: ELineServiceCreate, db: Session = Depends(get_db)):
@@ -434,24 +583,19 @@ def create_eline_service(service_payload: ELineServiceCreate, db: Session = Depe
 
     return db_service
 
-@router.get("/eline-services/{name}", response_model=ELineServiceRead)
-def get_eline_service(name: str, db: Session = Depends(get_db)):
-    service = db.get(ELineService, name)
-    if not service:
-        raise HTTPException(status_code=404, detail="Service not found")
-    return service
-
 @router.put("/eline-services/{name}", response_model=ELineServiceRead)
 def update_eline_service(name: str, update: ELineServiceUpdate, db: Session = Depends(get_db)):
     service = db.get(ELineService, name)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
+    old_node_ids = (service.a_node_id, service.z_node_id)
     update_data = update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(service, key, value)
     db.add(service)
     db.commit()
     db.refresh(service)
+    _invalidate_forwarding_cache(*old_node_ids, service.a_node_id, service.z_node_id)
     return service
 
 @router.delete("/eline-services/{name}")
@@ -461,37 +605,70 @@ def delete_eline_service(name: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Service not found")
     db.delete(service)
     db.commit()
+    _invalidate_forwarding_cache(service.a_node_id, service.z_node_id)
     return {"ok": True}
 
 # Helper to execute command on a node (refactored and simplified)
-async def _execute_node_command_internal(node_id: str, command_to_execute: str, db: Session) -> Optional[Dict[str, Any]]:
-    node = db.get(Node, node_id)
+async def _execute_node_command_internal(client: httpx.AsyncClient, node_id: str, command_to_execute: str, db: Session) -> Optional[Dict[str, Any]]:
+    # Kept on the event loop: callers gather several of these on one Session, which must
+    # not be used from concurrent threads, and the nodes are normally cached.
+    node = _resolve_node(node_id, db)
     if not node:
         log.warning(f"Node {node_id} not found for command execution.")
         return None
 
-    target_url = f"http://{node.ip}:{node.port}/execute"
+    target_url = f"{node.base_url}/execute"
     headers = {}  # No auth_token in Node model
     payload = {"command": command_to_execute}
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.post(target_url, json=payload, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except httpx.RequestError as e:
-            log.error(f"Connection error to node '{node_id}' for command '{command_to_execute}': {e}")
-        except httpx.HTTPStatusError as e:
-            log.error(f"Node '{node_id}' API error for command '{command_to_execute}': {e.response.status_code} - {e.response.text}")
-        except json.JSONDecodeError as e:
-            log.error(f"Invalid JSON response from node '{node_id}' for command '{command_to_execute}': {e}")
-        except Exception as e:
-            log.error(f"Unexpected error executing command '{command_to_execute}' on node '{node_id}': {e}", exc_info=True)
+    try:
+        async with _node_semaphores[node_id]:
+            response = await client.post(target_url, json=payload, headers=headers, timeout=HTTP_TIMEOUTS["execute"])
+        response.raise_for_status()
+        return response.json()
+    except httpx.RequestError as e:
+        log.error(f"Connection error to node '{node_id}' for command '{command_to_execute}': {e}")
+    except httpx.HTTPStatusError as e:
+        log.error(f"Node '{node_id}' API error for command '{command_to_execute}': {e.response.status_code} - {e.response.text}")
+    except json.JSONDecodeError as e:
+        log.error(f"Invalid JSON response from node '{node_id}' for command '{command_to_execute}': {e}")
+    except Exception as e:
+        log.error(f"Unexpected error executing command '{command_to_execute}' on node '{node_id}': {e}", exc_info=True)
     return None
 
-# Helper to get specific rule details from a node
-async def _get_rule_details_from_node(node_id: str, rule_name: str, db: Session) -> Optional[ForwardingRuleDetails]:
-    node_response = await _execute_node_command_internal(node_id, "xdp-switch show-forwarding json", db)
+FORWARDING_TABLE_COMMAND = "xdp-switch show-forwarding json"
+FORWARDING_TABLE_TTL = 2.0
+
+# Parsed forwarding tables keyed by (node_id, command), so dashboard refreshes
+# within a couple of seconds do not hit the nodes again
+_forwarding_cache = TTLCache(maxsize=256)
+_forwarding_locks: Dict[str, asyncio.Lock] = {}
+
+def _invalidate_forwarding_cache(*node_ids: Optional[str]):
+    for node_id in node_ids:
+        if node_id:
+            _forwarding_cache.pop((node_id, FORWARDING_TABLE_COMMAND))
+
+# Helper to fetch and parse the forwarding table of a node, cached for FORWARDING_TABLE_TTL
+async def _get_forwarding_rules_from_node(client: httpx.AsyncClient, node_id: str, db: Session) -> Optional[Dict[str, Dict[str, Any]]]:
+    cache_key = (node_id, FORWARDING_TABLE_COMMAND)
+    rules_by_name = _forwarding_cache.get(cache_key)
+    if rules_by_name is not None:
+        return rules_by_name
+
+    # Concurrent requests for the same node wait for one fetch instead of each issuing their own
+    lock = _forwarding_locks.setdefault(node_id, asyncio.Lock())
+    async with lock:
+        rules_by_name = _forwarding_cache.get(cache_key)
+        if rules_by_name is None:
+            rules_by_name = await _fetch_forwarding_rules_from_node(client, node_id, db)
+            # Failures are not cached so the next request retries the node
+            if rules_by_name is not None:
+                _forwarding_cache.set(cache_key, rules_by_name, FORWARDING_TABLE_TTL)
+    return rules_by_name
+
+async def _fetch_forwarding_rules_from_node(client: httpx.AsyncClient, node_id: str, db: Session) -> Optional[Dict[str, Dict[str, Any]]]:
+    node_response = await _execute_node_command_internal(client, node_id, FORWARDING_TABLE_COMMAND, db)
 
     if not node_response or not isinstance(node_response.get("output"), dict):
         log.warning(f"No valid output from node {node_id} when fetching rules.")
@@ -504,109 +681,115 @@ async def _get_rule_details_from_node(node_id: str, rule_name: str, db: Session)
 
     try:
         rules_list = json.loads(table_str)
-        if not isinstance(rules_list, list):
-            log.warning(f"Parsed forwarding table from node {node_id} is not a list.")
-            return None
-        
-        for rule_dict in rules_list:
-            if isinstance(rule_dict, dict) and rule_dict.get("name") == rule_name:
-                log.info(f"Rule found: {rule_dict}")  # <--- Agrega esto
-                try:
-                    return ForwardingRuleDetails.model_validate(rule_dict)
-                except Exception as e:
-                    log.error(f"Validation error for rule '{rule_name}' from node {node_id}. Data: {rule_dict}. Error: {e}", exc_info=True)
-                    return None
-        log.warning(f"Rule '{rule_name}' not found in forwarding table of node {node_id}.")
     except json.JSONDecodeError:
         log.error(f"Failed to parse forwarding table JSON string from node {node_id}.", exc_info=True)
-    return None
+        return None
+    if not isinstance(rules_list, list):
+        log.warning(f"Parsed forwarding table from node {node_id} is not a list.")
+        return None
+
+    # Index by name once so each service lookup is a dict access; the first rule with a name wins
+    rules_by_name: Dict[str, Dict[str, Any]] = {}
+    for rule_dict in rules_list:
+        if isinstance(rule_dict, dict) and "name" in rule_dict:
+            rules_by_name.setdefault(rule_dict["name"], rule_dict)
+    return rules_by_name
+
+# Helper to pick one rule out of a parsed forwarding table
+def _find_rule(rules_by_name: Optional[Dict[str, Dict[str, Any]]], node_id: str, rule_name: str) -> Optional[ForwardingRuleDetails]:
+    if not rules_by_name:
+        return None
+
+    rule_dict = rules_by_name.get(rule_name)
+    if rule_dict is None:
+        log.warning(f"Rule '{rule_name}' not found in forwarding table of node {node_id}.")
+        return None
+
+    log.debug("Rule found: %s", rule_dict)
+    try:
+        return ForwardingRuleDetails.model_validate(rule_dict)
+    except Exception as e:
+        log.error(f"Validation error for rule '{rule_name}' from node {node_id}. Data: {rule_dict}. Error: {e}", exc_info=True)
+        return None
+
+# Helper to fetch the forwarding tables of every node used by a set of services
+async def _get_forwarding_tables(
+    client: httpx.AsyncClient,
+    services: List[ELineService],
+    db: Session
+) -> Dict[str, Optional[Dict[str, Dict[str, Any]]]]:
+    node_ids = list({
+        node_id
+        for service in services
+        for node_id in (service.a_node_id, service.z_node_id)
+        if node_id
+    })
+    tables = await asyncio.gather(*(_get_forwarding_rules_from_node(client, node_id, db) for node_id in node_ids))
+    return dict(zip(node_ids, tables))
+
+# Helper to get specific rule details from a node
+async def _get_rule_details_from_node(client: httpx.AsyncClient, node_id: Optional[str], rule_name: Optional[str], db: Session) -> Optional[ForwardingRuleDetails]:
+    # One-node E-Lines have no Z side; skip the lookup instead of a db.get with a NULL key
+    if not node_id or not rule_name:
+        return None
+    rules_by_name = await _get_forwarding_rules_from_node(client, node_id, db)
+    return _find_rule(rules_by_name, node_id, rule_name)
+
+def _eline_service_dict(
+    db_service: ELineService,
+    a_rule_data: Optional[ForwardingRuleDetails],
+    z_rule_data: Optional[ForwardingRuleDetails]
+) -> Dict[str, Any]:
+    """
+    ELineServiceRead as a plain dict for ORJSONResponse, so listings do not build and
+    then re-validate a response model per service.
+    """
+    return {
+        "name": db_service.name,
+        "description": db_service.description,
+        "a_node_id": db_service.a_node_id,
+        "a_iface": db_service.a_iface,
+        "a_rule_name": db_service.a_rule_name,
+        "z_node_id": db_service.z_node_id,
+        "z_iface": db_service.z_iface,
+        "z_rule_name": db_service.z_rule_name,
+        "created_at": db_service.created_at,
+        "updated_at": db_service.updated_at,
+        "a_node_ip": db_service.a_node.ip if db_service.a_node else None,
+        "z_node_ip": db_service.z_node.ip if db_service.z_node else None,
+        "active": bool(a_rule_data and a_rule_data.active and z_rule_data and z_rule_data.active),
+        "a_rule_data": a_rule_data.model_dump() if a_rule_data else None,
+        "z_rule_data": z_rule_data.model_dump() if z_rule_data else None,
+    }
 
 # Modified GET /eline-services (list)
-@router.get("/eline-services", response_model=List[ELineServiceRead])
-async def list_eline_services_with_status(db: Session = Depends(get_db)): # Made async
-    services_from_db = db.exec(select(ELineService).options(selectinload(ELineService.a_node), selectinload(ELineService.z_node))).all() # Eager load nodes
+@router.get("/eline-services", response_model=List[ELineServiceRead], response_class=ORJSONResponse)
+async def list_eline_services_with_status(db: Session = Depends(get_db), client: httpx.AsyncClient = Depends(get_node_client)): # Made async
+    services_from_db = await run_in_threadpool(lambda: db.exec(_SELECT_ELINES).all()) # Eager load nodes
     
-    response_list = []
-    for db_service in services_from_db:
-        # Fetch rule details concurrently for efficiency
-        a_rule_task = _get_rule_details_from_node(db_service.a_node_id, db_service.a_rule_name, db)
-        z_rule_task = _get_rule_details_from_node(db_service.z_node_id, db_service.z_rule_name, db)
-        a_rule_data, z_rule_data = await asyncio.gather(a_rule_task, z_rule_task)
-
-        service_active = bool(a_rule_data and a_rule_data.active and z_rule_data and z_rule_data.active)
-        
-        a_node_ip = db_service.a_node.ip if db_service.a_node else None
-        z_node_ip = db_service.z_node.ip if db_service.z_node else None
-
-        response_list.append(ELineServiceRead(
-            name=db_service.name,
-            description=db_service.description,
-            a_node_id=db_service.a_node_id,
-            a_iface=db_service.a_iface,
-            a_rule_name=db_service.a_rule_name,
-            z_node_id=db_service.z_node_id,
-            z_iface=db_service.z_iface,
-            z_rule_name=db_service.z_rule_name,
-            created_at=db_service.created_at,
-            updated_at=db_service.updated_at,
-            a_node_ip=a_node_ip,
-            z_node_ip=z_node_ip,
-            active=service_active,
-            a_rule_data=a_rule_data, 
-            z_rule_data=z_rule_data 
-        ))
-    return response_list
+    # Fetch each node's forwarding table once, concurrently, however many services use it
+    rule_tables = await _get_forwarding_tables(client, services_from_db, db)
+
+    # Returned as a Response, so the response_model above only documents the shape
+    return ORJSONResponse([
+        _eline_service_dict(
+            db_service,
+            _find_rule(rule_tables.get(db_service.a_node_id), db_service.a_node_id, db_service.a_rule_name),
+            _find_rule(rule_tables.get(db_service.z_node_id), db_service.z_node_id, db_service.z_rule_name)
+        )
+        for db_service in services_from_db
+    ])
 
 # Modified GET /eline-services/{name} (detail)
-@router.get("/eline-services/{name}", response_model=ELineServiceRead)
-async def get_eline_service_details(name: str, db: Session = Depends(get_db)): # Made async
-    db_service = db.get(ELineService, name) # SQLModel get does not support options directly
-    if not db_service:
-        raise HTTPException(status_code=404, detail="E-Line Service not found")
-    
-    # Manually trigger loading of relationships if not already loaded by a_node/z_node access
-    # or ensure they are loaded via a separate query or configuration.
-    # For simplicity, assuming direct access works due to lazy="joined" or prior access.
-    # If a_node/z_node are None here, it means the FKs are bad or relationships aren't loading.
-    # Add selectinload to the initial query if needed:
-    db_service_full = db.exec(
-        select(ELineService).where(ELineService.name == name).options(
-            selectinload(ELineService.a_node), 
-            selectinload(ELineService.z_node)
-        )
-    ).first()
+@router.get("/eline-services/{name}", response_model=ELineServiceRead, response_class=ORJSONResponse)
+async def get_eline_service_details(name: str, db: Session = Depends(get_db), client: httpx.AsyncClient = Depends(get_node_client)): # Made async
+    db_service_full = await run_in_threadpool(lambda: db.exec(_SELECT_ELINE_BY_NAME, params={"name": name}).first())
 
-    if not db_service_full: # Should not happen if db.get found it, but good practice
-        raise HTTPException(status_code=404, detail="E-Line Service not found (consistency issue)")
+    if not db_service_full:
+        raise HTTPException(status_code=404, detail="Service not found")
 
-    a_rule_task = _get_rule_details_from_node(db_service_full.a_node_id, db_service_full.a_rule_name, db)
-    z_rule_task = _get_rule_details_from_node(db_service_full.z_node_id, db_service_full.z_rule_name, db)
+    a_rule_task = _get_rule_details_from_node(client, db_service_full.a_node_id, db_service_full.a_rule_name, db)
+    z_rule_task = _get_rule_details_from_node(client, db_service_full.z_node_id, db_service_full.z_rule_name, db)
     a_rule_data, z_rule_data = await asyncio.gather(a_rule_task, z_rule_task)
 
-    service_active = bool(a_rule_data and a_rule_data.active and z_rule_data and z_rule_data.active)
-    
-    a_node_ip = db_service_full.a_node.ip if db_service_full.a_node else None
-    z_node_ip = db_service_full.z_node.ip if db_service_full.z_node else None
-
-    return ELineServiceRead(
-        name=db_service_full.name,
-        description=db_service_full.description,
-        a_node_id=db_service_full.a_node_id,
-        a_iface=db_service_full.a_iface,
-        a_rule_name=db_service_full.a_rule_name,
-        z_node_id=db_service_full.z_node_id,
-        z_iface=db_service_full.z_iface,
-        z_rule_name=db_service_full.z_rule_name,
-        created_at=db_service_full.created_at,
-        updated_at=db_service_full.updated_at,
-        a_node_ip=a_node_ip,
-        z_node_ip=z_node_ip,
-        active=service_active,
-        a_rule_data=a_rule_data,
-        z_rule_data=z_rule_data
-    )
-
-# Ensure you have `from sqlalchemy.orm import selectinload` for eager loading
-# and `import asyncio`
-
-# ... (rest of your routes, including POST, PUT, DELETE for eline-services)
+    return ORJSONResponse(_eline_service_dict(db_service_full, a_rule_data, z_rule_data))
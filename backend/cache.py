@@ -0,0 +1,46 @@
+# backend/cache.py
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """
+    Minimal in-process cache whose entries expire after a per-entry TTL.
+    Once maxsize is reached, expired entries are purged first, then the oldest
+    live entry is evicted. Safe to share between the event loop and threadpool
+    workers: every operation holds a lock.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                self._data.pop(key, None)
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                now = time.monotonic()
+                for stale in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+                    del self._data[stale]
+                if len(self._data) >= self.maxsize:
+                    # Dicts keep insertion order, so the first key is the oldest entry
+                    self._data.pop(next(iter(self._data)), None)
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,21 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+CLOCK_TICK = 0.1  # seconds
+
+_now: Optional[datetime] = None
+
+async def clock_loop():
+    """Refresh the cached UTC time every CLOCK_TICK seconds."""
+    global _now
+    while True:
+        _now = datetime.now(timezone.utc)
+        await asyncio.sleep(CLOCK_TICK)
+
+def cached_utc_now() -> datetime:
+    """
+    Current UTC time with CLOCK_TICK resolution, for hot paths that only need
+    coarse timestamps. Falls back to the system clock until clock_loop has started.
+    """
+    return _now if _now is not None else datetime.now(timezone.utc)
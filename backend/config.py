@@ -1,11 +1,21 @@
+import logging
 import os
+import httpx
 VERSION = "v0.1.5"
 VMARK_ID = "208f3njq24390uvn3w9pou0rfnv309uvnq0329u4fn029ubnf30129ubc"
 HOST_IP = os.environ.get("HOST", "0.0.0.0")
 
+# Timeouts for calls to vMark-nodes. The connect timeout is kept short so an
+# unreachable node fails fast instead of holding a pooled connection for the full read timeout.
+HTTP_TIMEOUTS = {
+    "register": httpx.Timeout(5.0, connect=2.0),
+    "execute": httpx.Timeout(10.0, connect=2.0),
+    "status": httpx.Timeout(10.0, connect=2.0),
+}
+
 # Remove the specific development IP from the default.
 # Keep localhost/127.0.0.1 for potential direct API access during dev/testing if needed.
 DEFAULT_ALLOWED_ORIGINS = "http://localhost:5173,http://127.0.0.1:5173,http://192.168.178.119:5173" # Development server defaults
 ALLOWED_ORIGINS_STR = os.environ.get("ALLOWED_ORIGINS", DEFAULT_ALLOWED_ORIGINS)
 ALLOWED_ORIGINS = [origin.strip() for origin in ALLOWED_ORIGINS_STR.split(',') if origin.strip()]
-print(f"Config Loaded: HOST_IP={HOST_IP}, ALLOWED_ORIGINS={ALLOWED_ORIGINS}")
+logging.getLogger(__name__).info("Config loaded: HOST_IP=%s, ALLOWED_ORIGINS=%s", HOST_IP, ALLOWED_ORIGINS)
@@ -1,9 +1,31 @@
+from sqlalchemy import event
 from sqlmodel import create_engine, Session
 from backend.models.Node import Node
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./vmark.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 
+# Applied to every pooled connection as it is opened. WAL lets the list endpoints
+# keep reading while registrations and heartbeats write; with WAL, synchronous=NORMAL
+# is still safe against corruption and avoids an fsync per commit.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA cache_size=-65536",  # 64 MiB
+    # The heartbeat commits every second; truncate the WAL file back to this size
+    # after checkpoints so it does not stay at its high-water mark
+    "PRAGMA journal_size_limit=67108864",  # 64 MiB
+)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 def get_db():
     with Session(engine) as session:
         yield session
@@ -1,109 +1,310 @@
 import asyncio
+import logging
 import httpx
+import orjson
 from datetime import datetime, timedelta, timezone
-from sqlmodel import Session, select, delete
-from collections import deque
+from sqlmodel import Session, select, delete, update
+from sqlalchemy import bindparam, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from array import array
+from typing import NamedTuple
+from starlette.concurrency import run_in_threadpool
 
 from backend.db import engine
 from backend.models.Node import Node
-from backend.models.LatencyHistory import LatencyHistory
+from backend.models.LatencyHistory import LatencyHistory, LatencyHistoryMinute
 from backend.config import VMARK_ID
 
+log = logging.getLogger(__name__)
+
 HEARTBEAT_INTERVAL = 1  # seconds
 RETENTION_HOURS = 24
+RETENTION_EVERY_CYCLES = 60  # run the retention deletes once a minute, not every round
 API_TIMEOUT = 2  # seconds timeout for API requests
+HEARTBEAT_CONCURRENCY = 100  # max probes in flight at once
+LATENCY_WINDOW = 5  # readings averaged per node
+WRITE_QUEUE_SIZE = 1000  # probed rounds waiting for the writer before probing blocks
+
+# Every probe sends the same body, so encode it once instead of per request
+_HEARTBEAT_BODY = orjson.dumps({"vmark_id": VMARK_ID})  # The vMark ID authenticates the probe
+_HEARTBEAT_HEADERS = {"content-type": "application/json"}
+
+class LatencyWindow:
+    """
+    The last LATENCY_WINDOW latency readings of a node, in a preallocated ring buffer.
+    Keeps a running total (subtract the evicted reading, add the new one), so the
+    average costs O(1) instead of a sum over the window. Readings are whole
+    milliseconds, so the total stays exact.
+    """
+    __slots__ = ("samples", "index", "size", "total")
+
+    def __init__(self):
+        self.samples = array("d", [0.0]) * LATENCY_WINDOW
+        self.index = 0  # Slot the next reading goes into
+        self.size = 0
+        self.total = 0.0
+
+    def append(self, latency: float):
+        if self.size < LATENCY_WINDOW:
+            self.size += 1
+        else:
+            self.total -= self.samples[self.index]  # Evict the oldest reading
+        self.samples[self.index] = latency
+        self.total += latency
+        self.index = (self.index + 1) % LATENCY_WINDOW
+
+    def average(self) -> float:
+        return self.total / self.size
+
+    def clear(self):
+        self.index = 0
+        self.size = 0
+        self.total = 0.0
+
+    def __len__(self) -> int:
+        return self.size
+
+# Latency window per node, pruned each round to the nodes still in the database
+node_latency_data: dict[str, LatencyWindow] = {}
 
 # Function to add latency data for a node
 def add_latency(node_id: str, latency: float):
     if node_id not in node_latency_data:
-        node_latency_data[node_id] = deque(maxlen=5)  # Store the last 5 latency readings
+        node_latency_data[node_id] = LatencyWindow()
     node_latency_data[node_id].append(latency)
 
-# Create a deque to store latency values for each node for the last 5 minutes
-node_latency_data = {}
-
-# Function to calculate the average latency from the last 5 values
+# Function to calculate the average latency from the last LATENCY_WINDOW values
 def calculate_average_latency(node_id: str) -> float:
-    if node_id in node_latency_data and node_latency_data[node_id]:
-        return sum(node_latency_data[node_id]) / len(node_latency_data[node_id])
+    window = node_latency_data.get(node_id)
+    if window:
+        return window.average()
     return None  # If no data available, return None
 
-async def check_node_status(ip: str, port: int) -> tuple[bool, float]:
-    """
-    Check if a vMark-node is online by sending an API request
-    Returns (is_online, latency_in_ms)
-    """
-    try:
+def prune_latency_data(live_ids: set[str]):
+    """Drop the windows of nodes that were deleted."""
+    for node_id in node_latency_data.keys() - live_ids:
+        del node_latency_data[node_id]
+
+# Heartbeat URL per (ip, port), built once per node instead of every round
+_heartbeat_urls: dict[tuple[str, int], str] = {}
+
+def heartbeat_url(ip: str, port: int) -> str:
+    url = _heartbeat_urls.get((ip, port))
+    if url is None:
         # Format URL based on IP address format
         if ":" in ip:  # IPv6
             url = f"http://[{ip}]:{port}/api/heartbeat"
         else:  # IPv4
             url = f"http://{ip}:{port}/api/heartbeat"
+        _heartbeat_urls[(ip, port)] = url
+    return url
+
+def prune_heartbeat_urls(live_targets: set[tuple[str, int]]):
+    """Drop the URLs of nodes that were deleted or moved to another address."""
+    for target in _heartbeat_urls.keys() - live_targets:
+        del _heartbeat_urls[target]
+
+def upsert_latency_minute(session: Session, timestamp: datetime, samples: dict[str, float]):
+    """
+    Fold one round's latency samples (node_id -> latency_ms) into their per-minute
+    rollup buckets with a single multi-row upsert.
+    """
+    if not samples:
+        return
+    minute_ts = timestamp.replace(second=0, microsecond=0)
+    stmt = sqlite_insert(LatencyHistoryMinute).values([
+        {"node_id": node_id, "minute_ts": minute_ts, "sum_ms": latency_ms, "count": 1}
+        for node_id, latency_ms in samples.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["node_id", "minute_ts"],
+        set_={
+            "sum_ms": LatencyHistoryMinute.sum_ms + stmt.excluded.sum_ms,
+            "count": LatencyHistoryMinute.count + 1
+        }
+    )
+    session.exec(stmt)
+
+async def check_node_status(client: httpx.AsyncClient, ip: str, port: int) -> tuple[bool, float]:
+    """
+    Check if a vMark-node is online by sending an API request
+    Returns (is_online, latency_in_ms)
+    """
+    try:
+        url = heartbeat_url(ip, port)
         
-        # Start timing the request
-        start_time = datetime.now()
+        # Time the request on the loop's monotonic clock, immune to wall-clock jumps
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url,
-                json={"vmark_id": VMARK_ID},  # Send the vMark ID for authentication
-                timeout=API_TIMEOUT
-            )
-            
-            # Calculate elapsed time
-            elapsed_time = datetime.now() - start_time
-            latency_ms = elapsed_time.total_seconds() * 1000
-            
-            if response.status_code == 200:
-                return True, round(latency_ms)
-            else:
-                return False, 0
+        response = await client.post(
+            url,
+            content=_HEARTBEAT_BODY,
+            headers=_HEARTBEAT_HEADERS,
+            timeout=API_TIMEOUT
+        )
+        
+        # Calculate elapsed time
+        latency_ms = (loop.time() - start_time) * 1000
+        
+        if response.status_code == 200:
+            return True, round(latency_ms)
+        else:
+            return False, 0
     except Exception as e:
-        print(f"[API REQUEST ERROR] {ip}:{port} - {e}")
+        log.warning("Heartbeat request to %s:%s failed: %s", ip, port, e)
         return False, 0
 
-async def heartbeat_loop():
+class HeartbeatRound(NamedTuple):
+    """The database writes produced by one probe round"""
+    timestamp: datetime
+    history_rows: list[dict]
+    minute_samples: dict[str, float]
+    online_ids: list[str]
+    offline_ids: list[str]
+    run_retention: bool
+
+# Writer statements are built once; each round only supplies its parameters
+_INSERT_LATENCY_HISTORY = insert(LatencyHistory)
+_DELETE_OLD_HISTORY = delete(LatencyHistory).where(LatencyHistory.timestamp < bindparam("cutoff"))
+_DELETE_OLD_MINUTES = delete(LatencyHistoryMinute).where(LatencyHistoryMinute.minute_ts < bindparam("cutoff"))
+
+def write_round(session: Session, heartbeat_round: HeartbeatRound):
+    now = heartbeat_round.timestamp
+
+    # One UPDATE per status instead of one per node; nodes that were already
+    # offline are skipped, as the ORM used to skip unchanged rows
+    if heartbeat_round.online_ids:
+        session.exec(
+            update(Node).where(Node.id.in_(heartbeat_round.online_ids)).values(status="online", last_seen=now)
+        )
+    if heartbeat_round.offline_ids:
+        session.exec(
+            update(Node).where(Node.id.in_(heartbeat_round.offline_ids), Node.status != "offline").values(status="offline")
+        )
+
+    # Write the whole round's history in one Core executemany and one rollup upsert,
+    # instead of an ORM instance and flush per node. An empty parameter list would
+    # insert a single default row, so rounds without nodes are skipped.
+    if heartbeat_round.history_rows:
+        session.execute(_INSERT_LATENCY_HISTORY, heartbeat_round.history_rows)
+    upsert_latency_minute(session, now, heartbeat_round.minute_samples)
+
+    # Delete old data; most rounds would find nothing to delete
+    if heartbeat_round.run_retention:
+        cutoff = now - timedelta(hours=RETENTION_HOURS)
+        session.execute(_DELETE_OLD_HISTORY, {"cutoff": int(cutoff.timestamp())})
+        session.execute(_DELETE_OLD_MINUTES, {"cutoff": cutoff})
+
+def write_rounds(rounds: list[HeartbeatRound]):
+    with Session(engine) as session:
+        for heartbeat_round in rounds:
+            write_round(session, heartbeat_round)
+        session.commit()
+
+def load_nodes():
+    with Session(engine) as session:
+        # Only the columns the probes need; no Node instances to hydrate and track
+        return session.exec(select(Node.id, Node.ip, Node.port)).all()
+
+async def heartbeat_writer(queue: "asyncio.Queue[HeartbeatRound]"):
+    """
+    Write-behind for the probe loop: drains every round queued so far and writes them
+    in one transaction, so commits are shared when the writer falls behind and the
+    probes never wait on SQLite. The write runs in the threadpool, so a commit waiting
+    on fsync does not hold up the event loop.
+    """
     while True:
+        rounds = [await queue.get()]
+        while not queue.empty():
+            rounds.append(queue.get_nowait())
         try:
-            with Session(engine) as session:
-                nodes = session.exec(select(Node)).all()
-                now = datetime.now(timezone.utc)
-
-                for node in nodes:
-                    # Extract port from node data or use default
-                    port = node.port if hasattr(node, 'port') and node.port else 3000
-                    
-                    # Check node status using API request
-                    is_online, latency_ms = await check_node_status(node.ip, port)
-                    
-                    # Always create a history entry, use None for latency if offline
-                    avg_latency = None
-                    if is_online:
-                        add_latency(node.id, latency_ms)
-                        avg_latency = calculate_average_latency(node.id)
-                        node.status = "online"
-                        node.last_seen = now  # <--- Solo aquí
-                    else:
-                        if node.id in node_latency_data:
-                            node_latency_data[node.id].clear()
-                        node.status = "offline"
-                        # NO actualizar node.last_seen aquí
-                    
-                    # Save the latency history entry (average if online, None if offline)
-                    entry = LatencyHistory(
-                        node_id=node.id,
-                        timestamp=now,
-                        # Use avg_latency if calculated, otherwise use raw latency_ms if online, else None
-                        latency_ms=avg_latency if avg_latency is not None else (latency_ms if is_online else None)
-                    )
-                    session.add(entry)
-                    
-                # Delete old data
-                cutoff = now - timedelta(hours=RETENTION_HOURS)
-                session.exec(delete(LatencyHistory).where(LatencyHistory.timestamp < cutoff))
-
-                session.commit()
+            await run_in_threadpool(write_rounds, rounds)
         except Exception as e:
-            print("[HEARTBEAT ERROR]", e)
+            log.exception("Heartbeat writer error: %s", e)
 
-        await asyncio.sleep(HEARTBEAT_INTERVAL)  # Wait before the next check
+async def heartbeat_loop(client: httpx.AsyncClient):
+    """
+    Probe every node each HEARTBEAT_INTERVAL through the given client, which is kept
+    open across rounds so probes reuse pooled connections. Results are handed to
+    heartbeat_writer; cancelling this task stops both.
+    """
+    queue: "asyncio.Queue[HeartbeatRound]" = asyncio.Queue(maxsize=WRITE_QUEUE_SIZE)
+    await asyncio.gather(probe_loop(client, queue), heartbeat_writer(queue))
+
+async def probe_loop(client: httpx.AsyncClient, queue: "asyncio.Queue[HeartbeatRound]"):
+    semaphore = asyncio.Semaphore(HEARTBEAT_CONCURRENCY)
+
+    async def probe(target: tuple[str, int]) -> tuple[bool, float]:
+        async with semaphore:
+            return await check_node_status(client, *target)
+
+    loop = asyncio.get_running_loop()
+    cycle = 0
+    deadline = loop.time()
+    while True:
+        # Schedule rounds on fixed deadlines, so the work time of a round does not
+        # add to the interval and the samples stay HEARTBEAT_INTERVAL apart
+        deadline += HEARTBEAT_INTERVAL
+        try:
+            nodes = await run_in_threadpool(load_nodes)
+            now = datetime.now(timezone.utc)
+            epoch_seconds = int(now.timestamp())
+            # (ip, port) to probe per node, using the default port when none is stored
+            targets = [(node.ip, node.port or 3000) for node in nodes]
+            prune_latency_data({node.id for node in nodes})
+            prune_heartbeat_urls(set(targets))
+
+            # Probe every node concurrently, so a round takes about the slowest
+            # node's RTT instead of the sum over all nodes
+            results = await asyncio.gather(*(probe(target) for target in targets), return_exceptions=True)
+
+            history_rows = []
+            minute_samples = {}
+            online_ids = []
+            offline_ids = []
+            for node, result in zip(nodes, results):
+                if isinstance(result, BaseException):
+                    log.warning("Heartbeat probe of node %s failed: %s", node.id, result)
+                    result = (False, 0)
+                is_online, latency_ms = result
+                
+                # Always create a history entry, use None for latency if offline
+                avg_latency = None
+                if is_online:
+                    add_latency(node.id, latency_ms)
+                    avg_latency = calculate_average_latency(node.id)
+                    online_ids.append(node.id)  # last_seen is only refreshed for these
+                else:
+                    if node.id in node_latency_data:
+                        node_latency_data[node.id].clear()
+                    offline_ids.append(node.id)  # last_seen is left untouched
+                
+                # Queue the latency history entry (average if online, None if offline);
+                # an online node has just had a sample added, so its average is never None
+                history_rows.append({"node_id": node.id, "timestamp": epoch_seconds, "latency_ms": avg_latency})
+                if is_online:
+                    minute_samples[node.id] = avg_latency
+
+            await queue.put(HeartbeatRound(
+                timestamp=now,
+                history_rows=history_rows,
+                minute_samples=minute_samples,
+                online_ids=online_ids,
+                offline_ids=offline_ids,
+                run_retention=cycle % RETENTION_EVERY_CYCLES == 0
+            ))
+        except Exception as e:
+            log.exception("Heartbeat loop error: %s", e)
+
+        cycle += 1
+        delay = deadline - loop.time()
+        if delay < 0:
+            log.warning(
+                "Heartbeat round took %.2fs, longer than the %ss interval; consider raising HEARTBEAT_INTERVAL",
+                HEARTBEAT_INTERVAL - delay, HEARTBEAT_INTERVAL
+            )
+            # Start the next round now instead of trying to catch up on missed ones
+            deadline = loop.time()
+            delay = 0
+        await asyncio.sleep(delay)  # Wait before the next check
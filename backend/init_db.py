@@ -1,11 +1,84 @@
 # backend/init_db.py
+import json
 from sqlmodel import SQLModel
+from sqlalchemy import Integer, cast, func, insert, select, text, update
 from backend.db import engine
 from backend.models.Node import Node  # import your model
-from backend.models.LatencyHistory import LatencyHistory
+from backend.models.LatencyHistory import LatencyHistory, LatencyHistoryMinute
 
 def init_db():
     SQLModel.metadata.create_all(engine)
+    # create_all() skips tables that already exist, so make sure indexes added
+    # after a database was first created are present as well.
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    migrate_node_tags()
+    migrate_latency_timestamps()
+    backfill_latency_minute()
+
+def _is_json_tags(tags: str) -> bool:
+    try:
+        return isinstance(json.loads(tags), (list, type(None)))
+    except ValueError:
+        return False
+
+def migrate_node_tags():
+    """
+    Convert legacy comma-separated node.tags values to the JSON list format.
+    Runs on every start, so values already stored as JSON (a list, or the 'null'
+    the JSON column writes for None) are left alone.
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, CAST(tags AS TEXT) FROM node WHERE tags IS NOT NULL")).all()
+        for node_id, tags in rows:
+            if _is_json_tags(tags):
+                continue
+            tag_list = [tag for tag in tags.split(",") if tag]
+            conn.execute(
+                text("UPDATE node SET tags = :tags WHERE id = :id"),
+                {"tags": json.dumps(tag_list), "id": node_id}
+            )
+
+def migrate_latency_timestamps():
+    """
+    Convert legacy DATETIME latencyhistory.timestamp values to epoch seconds.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            update(LatencyHistory)
+            .where(func.typeof(LatencyHistory.timestamp) == "text")
+            .values(timestamp=cast(func.strftime("%s", LatencyHistory.timestamp), Integer))
+        )
+
+def backfill_latency_minute():
+    """
+    Seed the per-minute latency rollup from raw history when it is empty,
+    e.g. on the first start after upgrading a database that predates it.
+    """
+    with engine.begin() as conn:
+        if conn.execute(select(LatencyHistoryMinute.node_id).limit(1)).first():
+            return
+        # Bucket on integer epoch minutes rather than a formatted TEXT key, then render
+        # each bucket (not each sample) in the DATETIME format SQLAlchemy stores.
+        bucket = (LatencyHistory.timestamp // 60).label("bucket")
+        samples = (
+            select(LatencyHistory.node_id, bucket, LatencyHistory.latency_ms)
+            .where(LatencyHistory.latency_ms.is_not(None))
+            .subquery()
+        )
+        buckets = (
+            select(
+                samples.c.node_id,
+                func.strftime("%Y-%m-%d %H:%M:00.000000", samples.c.bucket * 60, "unixepoch"),
+                func.sum(samples.c.latency_ms),
+                func.count(samples.c.latency_ms)
+            )
+            .group_by(samples.c.node_id, samples.c.bucket)
+        )
+        conn.execute(
+            insert(LatencyHistoryMinute).from_select(["node_id", "minute_ts", "sum_ms", "count"], buckets)
+        )
 
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
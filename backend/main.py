@@ -1,28 +1,79 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse
 from backend.api.routes import router as api_router
-from backend.api.latency import router as latency_router
-from backend.heartbeat import heartbeat_loop
-from .db import get_db
-from .models.eline_service import ELineService
-from sqlmodel import Session, select
+from backend.api.latency import NEXT_AFTER_HEADER, router as latency_router
+from backend.heartbeat import API_TIMEOUT, HEARTBEAT_CONCURRENCY, heartbeat_loop
+from backend.clock import clock_loop
+from contextlib import asynccontextmanager
 import asyncio
 import os
 import backend.config as config
 import httpx
-import json
 
+NODE_KEEPALIVE_EXPIRY = 15.0  # seconds
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled client for every outbound call to vMark-nodes, reused across requests.
+    # Idle connections are kept longer than httpx's 5s default so they survive between
+    # dashboard polls (E-Line listing, TWAMP status) instead of being re-established.
+    app.state.node_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_keepalive_connections=100,
+            max_connections=1000,
+            keepalive_expiry=NODE_KEEPALIVE_EXPIRY
+        ),
+        timeout=config.HTTP_TIMEOUTS["execute"]
+    )
+    # Separate pool for heartbeat probes, so the per-second rounds never queue
+    # behind (or crowd out) user-facing node calls. Sized to the probe concurrency so
+    # every connection a round opens is kept alive for the next one, rather than the
+    # overflow above the keep-alive limit being closed and re-dialled each second.
+    app.state.http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_keepalive_connections=HEARTBEAT_CONCURRENCY,
+            max_connections=HEARTBEAT_CONCURRENCY
+        ),
+        timeout=API_TIMEOUT
+    )
+    background_tasks = [
+        asyncio.create_task(heartbeat_loop(app.state.http_client)),
+        asyncio.create_task(clock_loop()),
+    ]
+    yield
+    # Stop the loops before closing the clients they use
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await app.state.http_client.aclose()
+    await app.state.node_client.aclose()
+
+# Encode every JSON response with orjson instead of the stdlib json module
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.include_router(api_router, prefix="/api")
 app.include_router(latency_router, prefix="/api")
 
 STATIC_FILES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "frontend", "dist"))
 
-app.mount("/", StaticFiles(directory=STATIC_FILES_DIR, html=True), name="static-root")
+class CachedStaticFiles(StaticFiles):
+    """
+    Static files with cache headers suited to a Vite build: files under assets/ have
+    content hashes in their names and can be cached for good, while index.html and
+    other unhashed files must be revalidated so new builds are picked up.
+    """
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        relative_path = os.path.relpath(full_path, self.directory)
+        if relative_path.startswith("assets" + os.sep):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+app.mount("/", CachedStaticFiles(directory=STATIC_FILES_DIR, html=True), name="static-root")
 
 allowed_origins = config.ALLOWED_ORIGINS
 
@@ -32,34 +83,5 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_AFTER_HEADER],  # Raw latency paging cursor
 )
-
-async def check_rule_active(node_id: str, rule_name: str) -> bool:
-    # Ajusta la URL y el método según tu API real
-    from backend.models.Node import Node
-    from .db import get_db
-    with Session(get_db()) as db:
-        node = db.get(Node, node_id)
-        if not node:
-            return False
-        url = f"http://{node.ip}:{node.port}/execute"
-        payload = {"command": "xdp-switch show-forwarding json"}
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                res = await client.post(url, json=payload)
-                res.raise_for_status()
-                data = res.json()
-                rules = []
-                if data.get("output") and isinstance(data["output"].get("table"), str):
-                    rules = json.loads(data["output"]["table"])
-                elif data.get("output") and isinstance(data["output"].get("table"), list):
-                    rules = data["output"]["table"]
-                rule = next((r for r in rules if r.get("name") == rule_name), None)
-                return bool(rule and rule.get("active"))
-        except Exception as e:
-            print(f"[CHECK RULE ERROR] Node {node_id}: {e}")
-            return False
-
-@app.on_event("startup")
-async def startup_event():
-    asyncio.create_task(heartbeat_loop())
\ No newline at end of file
@@ -1,9 +1,31 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from datetime import datetime
 from typing import Optional
 
 class LatencyHistory(SQLModel, table=True):
+    # Every latency query filters on node_id + a timestamp range; trailing latency_ms
+    # makes the index covering on SQLite (no INCLUDE clause), so no table lookups are needed.
+    __table_args__ = (
+        Index("ix_lh_node_ts", "node_id", "timestamp", "latency_ms"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     node_id: str
-    timestamp: datetime
-    latency_ms: Optional[int]
\ No newline at end of file
+    # Epoch seconds (UTC): a small INTEGER instead of a 26-character DATETIME string,
+    # so rows and index entries are a fraction of the size.
+    # Indexed on its own for the retention DELETE, which is not node-scoped
+    timestamp: int = Field(index=True)
+    latency_ms: Optional[int]
+
+class LatencyHistoryMinute(SQLModel, table=True):
+    """
+    Per-minute latency rollup, maintained incrementally by the heartbeat writer.
+    AVG is derived at query time as sum_ms / count.
+    """
+    __tablename__ = "latency_history_minute"
+
+    node_id: str = Field(primary_key=True)
+    minute_ts: datetime = Field(primary_key=True, index=True)  # Own index for retention
+    sum_ms: float = 0.0
+    count: int = 0
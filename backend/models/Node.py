@@ -1,17 +1,22 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, JSON
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+
+def unpack_tags(tags: Optional[List[str]]) -> List[str]:
+    """Tags as stored in the JSON column (NULL for untagged nodes) as a list"""
+    return tags if tags else []
 
 class Node(SQLModel, table=True):
     id: str = Field(default=None, primary_key=True)
     ip: str
     port: Optional[int] = None
     status: str = "offline"
-    tags: Optional[str] = None
+    tags: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
     last_seen: Optional[datetime] = None
 
     def capabilities_list(self):
-        return self.tags.split(",") if self.tags else []
+        return list(unpack_tags(self.tags))
 
 
 # Revision identifiers, used by Alembic
@@ -1,8 +1,11 @@
+import logging
 from fastapi import WebSocket
 
+log = logging.getLogger(__name__)
+
 async def node_ws(websocket: WebSocket):
     await websocket.accept()
     while True:
         data = await websocket.receive_text()
-        print(f"Received: {data}")
+        log.debug("Received: %s", data)
         await websocket.send_text("Ack: " + data)
@@ -10,4 +10,4 @@ python -c "from backend.init_db import init_db; init_db()"
 echo "Starting application..."
 # Execute the uvicorn command passed as arguments to this script
 # Or directly run uvicorn if CMD is removed from Dockerfile
-exec uvicorn backend.main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+exec uvicorn backend.main:app --host 0.0.0.0 --port 8000 --log-level info --loop uvloop --http httptools
\ No newline at end of file